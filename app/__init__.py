@@ -4,9 +4,31 @@ Supports multiple databases (ODBC Microsoft Fabric and PostgreSQL)
 With Redis caching functionality
 """
 
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
 from flask import Flask
+from app.utils.json_provider import ORJSONProvider
+
+# Log level for the application loggers
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# Request threads only enqueue log records; a background listener
+# formats and writes them so stdout I/O never blocks a request
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+_log_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+_root_logger = logging.getLogger()
+_root_logger.addHandler(QueueHandler(_log_queue))
+_root_logger.setLevel(LOG_LEVEL)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Import routes after app is created to avoid circular imports
 from app.routes import db_api, hash_api, direct_connect
@@ -14,4 +36,4 @@ from app.routes import db_api, hash_api, direct_connect
 # Register blueprints
 app.register_blueprint(db_api.bp)
 app.register_blueprint(hash_api.bp)
-app.register_blueprint(direct_connect.bp)
\ No newline at end of file
+app.register_blueprint(direct_connect.bp)
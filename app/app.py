@@ -1,30 +1,30 @@
-from flask import Flask, request, jsonify
-import pyodbc
-import psycopg2
-import json
-import hashlib
-import redis
-import time
-import os
-from functools import wraps
+"""
+Connection string hash lookup through the external verification API
+The Flask application itself is created in the app package
+"""
 
-app = Flask(__name__)
+import os
+import requests
+from functools import lru_cache
 
-# Redis Configuration
-REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
-REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
-REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', None)
-REDIS_DB = int(os.environ.get('REDIS_DB', 0))
+# Hash verification service, reached through one keep-alive session
+_HASH_API_URL = os.environ.get('HASH_VERIFICATION_API', 'http://localhost:8000/verify-hash')
+_HASH_SESSION = requests.Session()
+_HASH_ADAPTER = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=64)
+_HASH_SESSION.mount('http://', _HASH_ADAPTER)
+_HASH_SESSION.mount('https://', _HASH_ADAPTER)
 
-# Initialize Redis client
-def get_redis_client():
-    return redis.Redis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        password=REDIS_PASSWORD,
-        db=REDIS_DB,
-        decode_responses=True
-    )
+@lru_cache(maxsize=4096)
+def _lookup_connection_string(connection_string_hash):
+    """
+    Resolve a hash through the verification API
+    
+    Failed lookups raise so that lru_cache only memoizes successful ones.
+    """
+    response = _HASH_SESSION.post(_HASH_API_URL, json={"hash": connection_string_hash}, timeout=2)
+    if response.status_code != 200:
+        raise LookupError(f"Hash verification failed with status {response.status_code}")
+    return response.json().get("connection_string")
 
 # Function to verify connection string hash
 def verify_hash(connection_string_hash):
@@ -34,9 +34,7 @@ def verify_hash(connection_string_hash):
     """
     # TODO: Implement according to the existing hash system
     # Simple implementation example (for demo only):
-    api_url = os.environ.get('HASH_VERIFICATION_API', 'http://localhost:8000/verify-hash')
-    import requests
-    response = requests.post(api_url, json={"hash": connection_string_hash})
-    if response.status_code == 200:
-        return response.json().get("connection_string")
-    return None
+    try:
+        return _lookup_connection_string(connection_string_hash)
+    except LookupError:
+        return None
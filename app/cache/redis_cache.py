@@ -3,31 +3,170 @@ Redis cache implementation
 """
 
 import os
-import json
+import time
 import hashlib
+import logging
+import threading
+import msgpack
 import redis
+from cachetools import TTLCache
 from functools import wraps
 
+log = logging.getLogger(__name__)
+
+# xxh3 is the fastest key digest; blake2b keeps keys short without it
+try:
+    import xxhash
+
+    def _key_digest(data):
+        return xxhash.xxh3_128_hexdigest(data)
+except ImportError:
+    def _key_digest(data):
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Cache values are msgpack
+def _dumps(obj):
+    return msgpack.packb(obj, default=str, use_bin_type=True)
+
+def _loads(payload):
+    return msgpack.unpackb(payload, raw=False)
+
+# zstd compression for larger payloads; entries stay readable without it
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Redis Configuration
 REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
 REDIS_PASSWORD = os.environ.get('REDIS_PASSWORD', None)
 REDIS_DB = int(os.environ.get('REDIS_DB', 0))
+REDIS_MAX_CONNECTIONS = int(os.environ.get('REDIS_MAX_CONNECTIONS', 32))
+
+# Payloads at least this large are zstd-compressed before storing
+CACHE_COMPRESS_BYTES = int(os.environ.get('CACHE_COMPRESS_BYTES', 1024))
+CACHE_COMPRESS_LEVEL = int(os.environ.get('CACHE_COMPRESS_LEVEL', 1))
+
+# Compressed payloads carry this prefix; a msgpack map never starts with it
+_ZSTD_MAGIC = b'\x01'
+
+# In-process L1 cache in front of Redis
+L1_CACHE_SIZE = int(os.environ.get('L1_CACHE_SIZE', 1024))
+L1_CACHE_TTL = int(os.environ.get('L1_CACHE_TTL', 60))
+
+# Table versions are remembered in-process for this many seconds, so L1 hits
+# need no Redis round trip; writes made through another worker reach this
+# one's reads within that window
+TABLE_VERSION_TTL = float(os.environ.get('TABLE_VERSION_TTL', 1))
+TABLE_VERSION_CACHE_SIZE = int(os.environ.get('TABLE_VERSION_CACHE_SIZE', 4096))
+
+# Shared connection pool, created once per worker process so cached calls
+# reuse open sockets instead of reconnecting on every request
+_POOL = redis.BlockingConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    password=REDIS_PASSWORD,
+    db=REDIS_DB,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    # Cache values are serialized bytes, parsed directly without a UTF-8 pass
+    decode_responses=False
+)
+
+# One client facade per worker thread, all drawing from the shared pool
+_CLIENT_LOCAL = threading.local()
 
 def get_redis_client():
     """
-    Get a Redis client instance
+    Get the Redis client for the current thread
+    
+    Responses are returned as raw bytes.
+    
+    Returns:
+        redis.Redis: Redis client backed by the module connection pool
+    """
+    client = getattr(_CLIENT_LOCAL, 'client', None)
+    if client is None:
+        client = _CLIENT_LOCAL.client = redis.Redis(connection_pool=_POOL)
+    return client
+
+# zstd contexts must not be shared between threads
+_ZSTD_LOCAL = threading.local()
+
+def _encode(result):
+    """
+    Serialize a result for Redis, compressing it when large enough
+    
+    Args:
+        result (dict): Result to serialize
+        
+    Returns:
+        bytes: Stored payload
+    """
+    payload = _dumps(result)
+    if zstandard is None or len(payload) < CACHE_COMPRESS_BYTES:
+        return payload
+    
+    compressor = getattr(_ZSTD_LOCAL, 'compressor', None)
+    if compressor is None:
+        compressor = _ZSTD_LOCAL.compressor = zstandard.ZstdCompressor(level=CACHE_COMPRESS_LEVEL)
+    return _ZSTD_MAGIC + compressor.compress(payload)
+
+def _decode(payload):
+    """
+    Parse a payload stored by _encode
     
+    Args:
+        payload (bytes): Stored payload
+        
     Returns:
-        redis.Redis: Redis client instance
+        dict: Parsed result
+        
+    Raises:
+        ValueError: If the payload is compressed and zstandard is unavailable
     """
-    return redis.Redis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        password=REDIS_PASSWORD,
-        db=REDIS_DB,
-        decode_responses=True
-    )
+    if payload[:1] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("Compressed cache entry but zstandard is not installed")
+        decompressor = getattr(_ZSTD_LOCAL, 'decompressor', None)
+        if decompressor is None:
+            decompressor = _ZSTD_LOCAL.decompressor = zstandard.ZstdDecompressor()
+        payload = decompressor.decompress(payload[1:])
+    return _loads(payload)
+
+# Entries are (expires_at, result) so a short cache_ttl is honoured even
+# though TTLCache itself applies a single TTL to every entry
+_L1 = TTLCache(maxsize=L1_CACHE_SIZE, ttl=L1_CACHE_TTL)
+_L1_LOCK = threading.Lock()
+
+def _l1_get(cache_key):
+    """
+    Get a result from the in-process cache
+    
+    Args:
+        cache_key (str): Cache key
+        
+    Returns:
+        dict: Cached result, or None if missing or expired
+    """
+    with _L1_LOCK:
+        entry = _L1.get(cache_key)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+def _l1_set(cache_key, result, cache_ttl):
+    """
+    Store a result in the in-process cache, never outliving the Redis entry
+    
+    Args:
+        cache_key (str): Cache key
+        result (dict): Result to store, must not be mutated afterwards
+        cache_ttl (int): TTL of the matching Redis entry in seconds
+    """
+    expires_at = time.monotonic() + min(cache_ttl, L1_CACHE_TTL)
+    with _L1_LOCK:
+        _L1[cache_key] = (expires_at, result)
 
 def redis_cache(func):
     """
@@ -41,43 +180,61 @@ def redis_cache(func):
     """
     @wraps(func)
     def wrapper(*args, **kwargs):
+        if not kwargs.get('cache_enabled', False):
+            # Cache disabled, strip the cache settings and directly execute function
+            kwargs.pop('cache_enabled', None)
+            kwargs.pop('cache_ttl', None)
+            return func(*args, **kwargs)
+        
         # Get cache settings from kwargs
-        cache_enabled = kwargs.pop('cache_enabled', False)
+        cache_enabled = kwargs.pop('cache_enabled')
         cache_ttl = kwargs.pop('cache_ttl', 3600)  # Default: 1 hour
         
-        if not cache_enabled:
-            # Cache disabled, directly execute function
-            return func(*args, **kwargs)
+        # Generate cache key from a packed binary form of the call arguments,
+        # including the function name for uniqueness
+        key_data = msgpack.packb(
+            (func.__name__, args, sorted(kwargs.items())),
+            use_bin_type=True,
+            default=str
+        )
+        cache_key = f"db_api:{func.__name__}:{_key_digest(key_data)}"
         
-        # Generate cache key
-        # Create a stable string representation of args and kwargs
-        args_str = str(args)
-        kwargs_str = str(sorted(kwargs.items()))
+        # Try the in-process cache first; hand out a copy since callers
+        # add fields such as execution_time to the result
+        local_result = _l1_get(cache_key)
+        if local_result is not None:
+            result = dict(local_result)
+            result['cached'] = True
+            return result
         
-        # Include function name in the cache key for uniqueness
-        key_data = f"{func.__name__}:{args_str}:{kwargs_str}"
+        redis_client = get_redis_client()
         
-        # Generate MD5 hash for the cache key
-        cache_key = f"db_api:{func.__name__}:{hashlib.md5(key_data.encode()).hexdigest()}"
-        
-        # Try to get from cache
+        # Try to get from cache; the entry and its remaining TTL come back
+        # in a single round trip
         try:
-            redis_client = get_redis_client()
-            cached_result = redis_client.get(cache_key)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.get(cache_key)
+            pipe.ttl(cache_key)
+            cached_result, remaining_ttl = pipe.execute()
             
             if cached_result:
                 try:
                     # Return cached result
-                    result = json.loads(cached_result)
+                    result = _decode(cached_result)
+                    
                     # Mark as coming from cache
                     result['cached'] = True
+                    
+                    # Keep the local copy no longer than the Redis entry lives
+                    if remaining_ttl > 0:
+                        _l1_set(cache_key, dict(result), min(cache_ttl, remaining_ttl))
                     return result
                 except Exception:
-                    # If JSON parsing fails, ignore cache
+                    # Unreadable entry, treat it as a miss
                     pass
         except Exception as e:
             # Log Redis connection error but continue with original function
-            print(f"Redis connection error: {str(e)}")
+            log.warning("Redis connection error: %s", e)
             # Continue with original function execution
         
         # Execute function
@@ -86,21 +243,144 @@ def redis_cache(func):
         # Cache result
         try:
             if cache_enabled and result:
-                # Copy result to avoid modifying the original
-                cache_result = result.copy()
-                # Set cached flag to False in the cached data
-                cache_result['cached'] = False 
+                # Serialize once; the function already reports cached=False,
+                # readers flip the flag on the parsed copy
+                payload = _encode(result)
                 
                 # Cache the result
-                redis_client.setex(
-                    cache_key, 
-                    cache_ttl, 
-                    json.dumps(cache_result, default=str)
-                )
+                redis_client.setex(cache_key, cache_ttl, payload)
+                
+                _l1_set(cache_key, dict(result), cache_ttl)
         except Exception as e:
             # Log cache error but continue
-            print(f"Redis cache error: {str(e)}")
+            log.warning("Redis cache error: %s", e)
         
         return result
     
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+def etag_cache_key(*parts):
+    """
+    Build the Redis key remembering the ETag of a response
+    
+    Args:
+        *parts: Values identifying the response, such as the request fields
+        
+    Returns:
+        str: Redis key
+    """
+    return f"db_api:etag:{_key_digest(_dumps(parts))}"
+
+def get_etag(cache_key):
+    """
+    Get the remembered ETag of a response
+    
+    Args:
+        cache_key (str): Key from etag_cache_key
+        
+    Returns:
+        str: ETag, or None if unknown or Redis is unreachable
+    """
+    try:
+        etag = get_redis_client().get(cache_key)
+        return etag.decode() if etag else None
+    except Exception as e:
+        log.warning("Redis connection error: %s", e)
+        return None
+
+def set_etag(cache_key, etag, cache_ttl):
+    """
+    Remember the ETag of a response
+    
+    Args:
+        cache_key (str): Key from etag_cache_key
+        etag (str): ETag of the response
+        cache_ttl (int): TTL in seconds
+    """
+    try:
+        get_redis_client().setex(cache_key, cache_ttl, etag)
+    except Exception as e:
+        log.warning("Redis cache error: %s", e)
+
+# Per-process copy of table versions, refreshed from Redis once expired
+# and updated directly by this process's own bumps
+_VERSIONS = TTLCache(maxsize=TABLE_VERSION_CACHE_SIZE, ttl=TABLE_VERSION_TTL)
+_VERSIONS_LOCK = threading.Lock()
+
+def _table_version_keys(scope, tables):
+    """
+    Build the Redis keys holding table versions
+    
+    The first key holds the version of the whole database, bumped by
+    writes whose tables are unknown.
+    
+    Args:
+        scope (tuple): Values identifying the database, such as
+            (db_type, connection_string); hashed, never stored as is
+        tables (tuple): Table names
+        
+    Returns:
+        list: Redis keys, the database key followed by one per table
+    """
+    scope_key = f"db_api:table_version:{_key_digest(_dumps(scope))}"
+    return [scope_key] + [f"{scope_key}:{table}" for table in tables]
+
+def get_table_versions(scope, tables):
+    """
+    Get the current versions of the database and tables, for binding cache
+    keys to them
+    
+    Args:
+        scope (tuple): Values identifying the database
+        tables (tuple): Table names
+        
+    Returns:
+        tuple: Database version followed by the version per table, 0 for
+            tables never written through the API, or None if Redis is
+            unreachable
+    """
+    version_keys = _table_version_keys(scope, tables)
+    with _VERSIONS_LOCK:
+        versions = [_VERSIONS.get(version_key) for version_key in version_keys]
+    
+    missing = [index for index, version in enumerate(versions) if version is None]
+    if missing:
+        try:
+            fetched = get_redis_client().mget([version_keys[index] for index in missing])
+        except Exception as e:
+            log.warning("Redis connection error: %s", e)
+            return None
+        with _VERSIONS_LOCK:
+            for index, version in zip(missing, fetched):
+                versions[index] = _VERSIONS[version_keys[index]] = int(version) if version else 0
+    return tuple(versions)
+
+def bump_table_versions(scope, tables=None):
+    """
+    Advance versions after a write, so cached results that read the
+    written tables are no longer looked up
+    
+    Args:
+        scope (tuple): Values identifying the database
+        tables (tuple, optional): Table names; None bumps the database
+            version, which retires every cached result of the database
+    """
+    version_keys = _table_version_keys(scope, tables or ())
+    if tables:
+        version_keys = version_keys[1:]
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for version_key in version_keys:
+            pipe.incr(version_key)
+        versions = pipe.execute()
+    except Exception as e:
+        log.warning("Redis cache error: %s", e)
+        # Make this process read the versions again, finding Redis down
+        # rather than serving L1 entries bound to the old versions
+        with _VERSIONS_LOCK:
+            for version_key in version_keys:
+                _VERSIONS.pop(version_key, None)
+        return
+    with _VERSIONS_LOCK:
+        for version_key, version in zip(version_keys, versions):
+            _VERSIONS[version_key] = version
@@ -2,9 +2,9 @@
 Database connector package initialization
 """
 
-from app.db.connector import get_db_connector
+from app.db.connector import get_db_connector, canonical_db_type
 from app.db.base_connector import BaseConnector
 from app.db.odbc_connector import ODBCConnector
 from app.db.postgres_connector import PostgresConnector
 
-__all__ = ['get_db_connector', 'BaseConnector', 'ODBCConnector', 'PostgresConnector']
\ No newline at end of file
+__all__ = ['get_db_connector', 'canonical_db_type', 'BaseConnector', 'ODBCConnector', 'PostgresConnector']
\ No newline at end of file
@@ -38,12 +38,34 @@ class BaseConnector:
             self.connection.close()
             self.connection = None
 
-    def execute_query(self, query):
+    def __enter__(self):
+        """
+        Connect when entering a with block
+        
+        Returns:
+            BaseConnector: The connected connector
+        """
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Disconnect when leaving a with block, even on error
+        """
+        self.disconnect()
+
+    def execute_query(self, query, params=None, stream=False, result_format="records"):
         """
         Execute a query and return results
         
         Args:
             query (str): SQL query to execute
+            params (tuple, optional): Values for the driver's placeholders
+            stream (bool): Read large result sets incrementally where the
+                driver supports it
+            result_format (str): "records" for a dict per row under "data",
+                "rows" for value lists under "rows", or a driver-specific
+                bulk format such as "csv"
             
         Returns:
             dict: Query results
@@ -5,6 +5,15 @@ Database connector factory
 from app.db.odbc_connector import ODBCConnector
 from app.db.postgres_connector import PostgresConnector
 
+# Supported db_type values mapped to their connector class
+_DISPATCH = {
+    "fabric": ODBCConnector,
+    "odbc": ODBCConnector,
+    "microsoft_fabric": ODBCConnector,
+    "postgres": PostgresConnector,
+    "postgresql": PostgresConnector,
+}
+
 def get_db_connector(connection_string, db_type):
     """
     Factory function to get the appropriate database connector
@@ -19,9 +28,22 @@ def get_db_connector(connection_string, db_type):
     Raises:
         ValueError: If the database type is not supported
     """
-    if db_type.lower() in ["fabric", "odbc", "microsoft_fabric"]:
-        return ODBCConnector(connection_string)
-    elif db_type.lower() in ["postgres", "postgresql"]:
-        return PostgresConnector(connection_string)
-    else:
-        raise ValueError(f"Unsupported database type: {db_type}")
\ No newline at end of file
+    connector_class = _DISPATCH.get(db_type.lower())
+    if connector_class is None:
+        raise ValueError(f"Unsupported database type: {db_type}")
+    return connector_class(connection_string)
+
+def canonical_db_type(db_type):
+    """
+    Reduce the spellings of a database type to one name per connector
+    
+    Args:
+        db_type (str): Database type (fabric, odbc, postgres, postgresql)
+        
+    Returns:
+        str: Connector class name, or db_type unchanged if it is not supported
+    """
+    connector_class = _DISPATCH.get(db_type.lower()) if isinstance(db_type, str) else None
+    if connector_class is None:
+        return db_type
+    return connector_class.__name__
@@ -3,8 +3,128 @@ ODBC (Microsoft Fabric) connector implementation
 """
 
 import pyodbc
+from itertools import groupby
+from operator import attrgetter
 from app.db.base_connector import BaseConnector
 
+# Rows fetched per round trip, caps peak memory on large result sets
+FETCH_BATCH_SIZE = 10000
+
+# Object names are sysname, i.e. nvarchar(128)
+_NAME_PARAM_SIZES = [(pyodbc.SQL_WVARCHAR, 128, 0)]
+
+# Catalog queries for a single table, bound to the table name
+_Q_COLUMNS = """
+SELECT
+    c.name AS column_name,
+    t.name AS data_type,
+    c.max_length,
+    c.precision,
+    c.scale,
+    c.is_nullable,
+    c.is_identity,
+    c.column_id
+FROM sys.columns c
+JOIN sys.types t ON c.user_type_id = t.user_type_id
+JOIN sys.tables tbl ON c.object_id = tbl.object_id
+WHERE tbl.name = ?
+ORDER BY c.column_id
+"""
+
+_Q_PK = """
+SELECT
+    i.name AS index_name,
+    c.name AS column_name
+FROM sys.indexes i
+JOIN sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+JOIN sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+JOIN sys.tables t ON i.object_id = t.object_id
+WHERE i.is_primary_key = 1 AND t.name = ?
+ORDER BY ic.key_ordinal
+"""
+
+_Q_FK = """
+SELECT
+    fk.name AS fk_name,
+    OBJECT_NAME(fk.parent_object_id) AS parent_table,
+    COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS parent_column,
+    OBJECT_NAME(fk.referenced_object_id) AS referenced_table,
+    COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS referenced_column
+FROM sys.foreign_keys fk
+JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
+WHERE OBJECT_NAME(fk.parent_object_id) = ?
+ORDER BY fk.name, fkc.constraint_column_id
+"""
+
+# The three single-table queries sent as one batch, one result set each
+_Q_TABLE_BATCH = ";\n".join([_Q_COLUMNS, _Q_PK, _Q_FK])
+_TABLE_BATCH_PARAM_SIZES = _NAME_PARAM_SIZES * 3
+
+# Catalog queries spanning every table
+_Q_ALL_COLUMNS = """
+SELECT
+    tbl.name AS table_name,
+    c.name AS column_name,
+    t.name AS data_type,
+    c.max_length,
+    c.precision,
+    c.scale,
+    c.is_nullable,
+    c.is_identity,
+    c.column_id
+FROM sys.columns c
+JOIN sys.types t ON c.user_type_id = t.user_type_id
+JOIN sys.tables tbl ON c.object_id = tbl.object_id
+ORDER BY tbl.name, c.column_id
+"""
+
+_Q_ALL_PK = """
+SELECT
+    t.name AS table_name,
+    i.name AS index_name,
+    c.name AS column_name
+FROM sys.indexes i
+JOIN sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+JOIN sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+JOIN sys.tables t ON i.object_id = t.object_id
+WHERE i.is_primary_key = 1
+ORDER BY t.name, ic.key_ordinal
+"""
+
+_Q_ALL_FK = """
+SELECT
+    fk.name AS fk_name,
+    OBJECT_NAME(fk.parent_object_id) AS parent_table,
+    COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS parent_column,
+    OBJECT_NAME(fk.referenced_object_id) AS referenced_table,
+    COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS referenced_column
+FROM sys.foreign_keys fk
+JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
+ORDER BY OBJECT_NAME(fk.parent_object_id), fk.name, fkc.constraint_column_id
+"""
+
+# Definition of a single view, procedure or function, bound to its name
+_Q_MODULE_DEFINITIONS = {
+    "view": """
+SELECT m.definition
+FROM sys.sql_modules m
+JOIN sys.views v ON m.object_id = v.object_id
+WHERE v.name = ?
+""",
+    "procedure": """
+SELECT m.definition
+FROM sys.sql_modules m
+JOIN sys.procedures p ON m.object_id = p.object_id
+WHERE p.name = ?
+""",
+    "function": """
+SELECT m.definition
+FROM sys.sql_modules m
+JOIN sys.objects o ON m.object_id = o.object_id
+WHERE o.type_desc LIKE '%FUNCTION%' AND o.name = ?
+""",
+}
+
 class ODBCConnector(BaseConnector):
     """
     ODBC connector for Microsoft Fabric and other ODBC-compatible databases
@@ -26,43 +146,154 @@ class ODBCConnector(BaseConnector):
         except Exception as e:
             raise ConnectionError(f"Failed to connect to ODBC database: {str(e)}")
 
-    def execute_query(self, query):
+    def execute_query(self, query, params=None, stream=False, result_format="records"):
         """
         Execute a query on the ODBC database
         
         Args:
             query (str): SQL query to execute
+            params (tuple, optional): Values for ? placeholders in the query
+            stream (bool): Accepted for interface parity; rows are always
+                read in batches of FETCH_BATCH_SIZE
+            result_format (str): "records" returns each row as a dict under
+                "data", "rows" returns plain value lists under "rows"
             
         Returns:
-            dict: Query results with columns, data, and row count
+            dict: Query results with columns, data or rows, and row count
+            
+        Raises:
+            ValueError: If the result format is not supported
         """
+        if result_format not in ("records", "rows"):
+            raise ValueError(f"Unsupported result format: {result_format}")
+        
         if not self.connection:
             self.connect()
         
         cursor = self.connection.cursor()
         try:
-            cursor.execute(query)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
             
             # Get column names if results exist
             columns = []
             if cursor.description:
                 columns = [column[0] for column in cursor.description]
             
-            # Fetch all results
+            # Fetch results in batches
             results = []
             if cursor.description:  # Only try to fetch if there are results
-                for row in cursor.fetchall():
-                    results.append(dict(zip(columns, row)))
+                # Bind the per-batch lookups once, outside the loop
+                fetchmany = cursor.fetchmany
+                extend = results.extend
+                as_rows = result_format == "rows"
+                while True:
+                    batch = fetchmany(FETCH_BATCH_SIZE)
+                    if not batch:
+                        break
+                    if as_rows:
+                        extend([tuple(row) for row in batch])
+                    else:
+                        extend([dict(zip(columns, row)) for row in batch])
             
             return {
                 "columns": columns,
-                "data": results,
+                "data" if result_format == "records" else "rows": results,
                 "row_count": len(results) if cursor.description else cursor.rowcount,
                 "affected_rows": cursor.rowcount if not cursor.description else 0
             }
         finally:
             cursor.close()
 
+    def _iter_rows(self, query, params=None, input_sizes=None):
+        """
+        Execute a catalog query and yield its rows lazily
+        
+        pyodbc rows are compact tuples that also expose columns as
+        attributes, so internal callers skip building a dict per row.
+        The cursor stays open until the generator is exhausted or closed,
+        so no other query may run on the connection meanwhile.
+        
+        Args:
+            query (str): SQL query to execute
+            params (tuple, optional): Values for ? placeholders in the query
+            input_sizes (list, optional): Parameter types passed to
+                cursor.setinputsizes so the driver skips describing them
+            
+        Yields:
+            pyodbc.Row: Result rows, none if the query returns no result set
+        """
+        if not self.connection:
+            self.connect()
+        
+        cursor = self.connection.cursor()
+        try:
+            if input_sizes:
+                cursor.setinputsizes(input_sizes)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            if cursor.description:
+                while True:
+                    batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+                    if not batch:
+                        break
+                    yield from batch
+        finally:
+            cursor.close()
+
+    def _fetch_rows(self, query, params=None, input_sizes=None):
+        """
+        Execute a catalog query and return all rows
+        
+        Args:
+            query (str): SQL query to execute
+            params (tuple, optional): Values for ? placeholders in the query
+            input_sizes (list, optional): Parameter types, see _iter_rows
+            
+        Returns:
+            list: pyodbc.Row objects, empty if the query returns no result set
+        """
+        return list(self._iter_rows(query, params, input_sizes))
+
+    def _fetch_result_sets(self, query, params=None, input_sizes=None):
+        """
+        Execute a multi-statement batch and return the rows of every result set
+        
+        Args:
+            query (str): SQL batch to execute
+            params (tuple, optional): Values for ? placeholders in the batch
+            input_sizes (list, optional): Parameter types, see _iter_rows
+            
+        Returns:
+            list: One list of pyodbc.Row objects per result set, in order
+        """
+        if not self.connection:
+            self.connect()
+        
+        cursor = self.connection.cursor()
+        try:
+            if input_sizes:
+                cursor.setinputsizes(input_sizes)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            
+            result_sets = []
+            while True:
+                if cursor.description:
+                    result_sets.append(cursor.fetchall())
+                if not cursor.nextset():
+                    break
+            return result_sets
+        finally:
+            cursor.close()
+
     def get_ddl(self, object_name, object_type):
         """
         Get DDL for Microsoft Fabric/SQL Server objects
@@ -78,170 +309,156 @@ class ODBCConnector(BaseConnector):
         
         if object_type == "table":
             if object_name == '*':
-                # Get all tables
-                tables_query = """
-                SELECT name
-                FROM sys.tables
-                ORDER BY name
-                """
-                
-                tables_result = self.execute_query(tables_query)
+                # Get all tables in one pass over the catalog
+                table_ddls = self._bulk_table_ddls()
                 
-                if not tables_result["data"]:
+                if not table_ddls:
                     return "-- No tables found in database"
                 
-                # Build DDL for each table
-                all_ddl = ""
-                for table in tables_result["data"]:
-                    table_name = table["name"]
-                    table_ddl = self.get_ddl(table_name, "table")
-                    all_ddl += f"\n\n{table_ddl}"
-                
-                return all_ddl.strip()
+                return "\n\n".join(table_ddls.values())
             else:
-                # Query to get table DDL
-                query = f"""
-                SELECT 
-                    c.name AS column_name,
-                    t.name AS data_type,
-                    c.max_length,
-                    c.precision,
-                    c.scale,
-                    c.is_nullable,
-                    c.is_identity,
-                    c.column_id
-                FROM sys.columns c
-                JOIN sys.types t ON c.user_type_id = t.user_type_id
-                JOIN sys.tables tbl ON c.object_id = tbl.object_id
-                WHERE tbl.name = '{object_name}'
-                ORDER BY c.column_id
-                """
+                # Get columns, primary key and foreign keys in one round trip
+                columns_rows, pk_rows, fk_rows = self._fetch_result_sets(
+                    _Q_TABLE_BATCH, (object_name,) * 3, _TABLE_BATCH_PARAM_SIZES
+                )
                 
-                columns_info = self.execute_query(query)
-                
-                # Build CREATE TABLE statement
-                ddl = f"CREATE TABLE {object_name} (\n"
-                for i, col in enumerate(columns_info["data"]):
-                    ddl += f"    {col['column_name']} {col['data_type']}"
-                    
-                    # Add length, precision, scale if applicable
-                    if col['data_type'] in ('varchar', 'nvarchar', 'char', 'nchar'):
-                        ddl += f"({col['max_length'] if col['max_length'] != -1 else 'MAX'})"
-                    elif col['data_type'] in ('decimal', 'numeric'):
-                        ddl += f"({col['precision']}, {col['scale']})"
-                    
-                    # Add NULL constraint
-                    ddl += " NOT NULL" if not col['is_nullable'] else " NULL"
-                    
-                    # Add identity property
-                    if col['is_identity']:
-                        ddl += " IDENTITY(1,1)"
-                    
-                    # Add comma if not the last column
-                    if i < len(columns_info["data"]) - 1:
-                        ddl += ",\n"
-                    
-                ddl += "\n);"
-                
-                # Get primary key
-                pk_query = f"""
-                SELECT 
-                    i.name AS index_name,
-                    c.name AS column_name
-                FROM sys.indexes i
-                JOIN sys.index_columns ic ON i.object_id = ic.object_id AND i.index_id = ic.index_id
-                JOIN sys.columns c ON ic.object_id = c.object_id AND ic.column_id = c.column_id
-                JOIN sys.tables t ON i.object_id = t.object_id
-                WHERE i.is_primary_key = 1 AND t.name = '{object_name}'
-                ORDER BY ic.key_ordinal
-                """
-                
-                pk_info = self.execute_query(pk_query)
-                if pk_info["data"]:
-                    pk_columns = ", ".join([row["column_name"] for row in pk_info["data"]])
-                    pk_name = pk_info["data"][0]["index_name"]
-                    ddl += f"\n\nALTER TABLE {object_name} ADD CONSTRAINT {pk_name} PRIMARY KEY ({pk_columns});"
-                
-                # Get foreign keys
-                fk_query = f"""
-                SELECT 
-                    fk.name AS fk_name,
-                    OBJECT_NAME(fk.parent_object_id) AS parent_table,
-                    COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS parent_column,
-                    OBJECT_NAME(fk.referenced_object_id) AS referenced_table,
-                    COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id) AS referenced_column
-                FROM sys.foreign_keys fk
-                JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-                WHERE OBJECT_NAME(fk.parent_object_id) = '{object_name}'
-                ORDER BY fk.name, fkc.constraint_column_id
-                """
-                
-                fk_info = self.execute_query(fk_query)
-                if fk_info["data"]:
-                    # Group by FK name
-                    fk_dict = {}
-                    for row in fk_info["data"]:
-                        fk_name = row["fk_name"]
-                        if fk_name not in fk_dict:
-                            fk_dict[fk_name] = {
-                                "parent_table": row["parent_table"],
-                                "referenced_table": row["referenced_table"],
-                                "parent_columns": [],
-                                "referenced_columns": []
-                            }
-                        fk_dict[fk_name]["parent_columns"].append(row["parent_column"])
-                        fk_dict[fk_name]["referenced_columns"].append(row["referenced_column"])
-                    
-                    # Create ALTER TABLE statements for each FK
-                    for fk_name, fk_data in fk_dict.items():
-                        parent_cols = ", ".join(fk_data["parent_columns"])
-                        ref_cols = ", ".join(fk_data["referenced_columns"])
-                        ddl += f"\n\nALTER TABLE {fk_data['parent_table']} ADD CONSTRAINT {fk_name} "
-                        ddl += f"FOREIGN KEY ({parent_cols}) REFERENCES {fk_data['referenced_table']} ({ref_cols});"
-                
-                return ddl
+                return self._build_table_ddl(object_name, columns_rows, pk_rows, fk_rows)
             
         elif object_type == "view":
             # Get view definition
-            query = f"""
-            SELECT definition 
-            FROM sys.sql_modules m
-            JOIN sys.views v ON m.object_id = v.object_id
-            WHERE v.name = '{object_name}'
-            """
-            
-            view_info = self.execute_query(query)
-            if view_info["data"]:
-                return f"CREATE VIEW {object_name} AS\n{view_info['data'][0]['definition']}"
+            definition = self._get_module_definition("view", object_name)
+            if definition is not None:
+                return f"CREATE VIEW {object_name} AS\n{definition}"
             return f"-- View {object_name} definition not found"
             
         elif object_type in ["procedure", "stored_procedure"]:
             # Get stored procedure definition
-            query = f"""
-            SELECT definition 
-            FROM sys.sql_modules m
-            JOIN sys.procedures p ON m.object_id = p.object_id
-            WHERE p.name = '{object_name}'
-            """
-            
-            proc_info = self.execute_query(query)
-            if proc_info["data"]:
-                return proc_info["data"][0]["definition"]
+            definition = self._get_module_definition("procedure", object_name)
+            if definition is not None:
+                return definition
             return f"-- Stored procedure {object_name} definition not found"
             
         elif object_type == "function":
             # Get function definition
-            query = f"""
-            SELECT definition 
-            FROM sys.sql_modules m
-            JOIN sys.objects o ON m.object_id = o.object_id
-            WHERE o.type_desc LIKE '%FUNCTION%' AND o.name = '{object_name}'
-            """
-            
-            func_info = self.execute_query(query)
-            if func_info["data"]:
-                return func_info["data"][0]["definition"]
+            definition = self._get_module_definition("function", object_name)
+            if definition is not None:
+                return definition
             return f"-- Function {object_name} definition not found"
             
         else:
-            return f"-- DDL generation for {object_type} is not supported yet"
\ No newline at end of file
+            return f"-- DDL generation for {object_type} is not supported yet"
+
+    def _get_module_definition(self, kind, name):
+        """
+        Look up a view, procedure or function definition
+        
+        Args:
+            kind (str): One of view, procedure, function
+            name (str): Object name
+            
+        Returns:
+            str: Module definition, or None if not found
+        """
+        rows = self._fetch_rows(_Q_MODULE_DEFINITIONS[kind], (name,), _NAME_PARAM_SIZES)
+        return rows[0].definition if rows else None
+
+    def _bulk_table_ddls(self):
+        """
+        Build DDL for every table using one query per metadata kind
+        
+        Returns:
+            dict: Table name to DDL statement, ordered by table name
+        """
+        pk_rows = self._fetch_rows(_Q_ALL_PK)
+        fk_rows = self._fetch_rows(_Q_ALL_FK)
+        
+        # Stream the column rows last, they are by far the largest set
+        columns_rows = self._iter_rows(_Q_ALL_COLUMNS)
+        
+        # Group PK and FK rows by their owning table
+        pk_by_table = {
+            name: list(rows)
+            for name, rows in groupby(pk_rows, key=attrgetter("table_name"))
+        }
+        fk_by_table = {
+            name: list(rows)
+            for name, rows in groupby(fk_rows, key=attrgetter("parent_table"))
+        }
+        
+        table_ddls = {}
+        for name, columns in groupby(columns_rows, key=attrgetter("table_name")):
+            table_ddls[name] = self._build_table_ddl(
+                name, list(columns), pk_by_table.get(name, []), fk_by_table.get(name, [])
+            )
+        
+        return table_ddls
+
+    def _build_table_ddl(self, table_name, columns, pk_rows, fk_rows):
+        """
+        Assemble CREATE TABLE and constraint statements from catalog rows
+        returned by _fetch_rows
+        
+        Args:
+            table_name (str): Name of the table
+            columns (list): Column rows ordered by column_id
+            pk_rows (list): Primary key rows ordered by key ordinal
+            fk_rows (list): Foreign key rows ordered by constraint and column
+            
+        Returns:
+            str: DDL statement for the table
+        """
+        # Build column definitions
+        column_defs = []
+        for col in columns:
+            parts = ["    ", col.column_name, " ", col.data_type]
+            
+            # Add length, precision, scale if applicable
+            if col.data_type in ('varchar', 'nvarchar', 'char', 'nchar'):
+                parts.append(f"({col.max_length if col.max_length != -1 else 'MAX'})")
+            elif col.data_type in ('decimal', 'numeric'):
+                parts.append(f"({col.precision}, {col.scale})")
+            
+            # Add NULL constraint
+            parts.append(" NOT NULL" if not col.is_nullable else " NULL")
+            
+            # Add identity property
+            if col.is_identity:
+                parts.append(" IDENTITY(1,1)")
+            
+            column_defs.append("".join(parts))
+        
+        # Build CREATE TABLE statement
+        statements = [f"CREATE TABLE {table_name} (\n" + ",\n".join(column_defs) + "\n);"]
+        
+        # Add primary key
+        if pk_rows:
+            pk_columns = ", ".join([row.column_name for row in pk_rows])
+            pk_name = pk_rows[0].index_name
+            statements.append(f"ALTER TABLE {table_name} ADD CONSTRAINT {pk_name} PRIMARY KEY ({pk_columns});")
+        
+        # Add foreign keys
+        if fk_rows:
+            # Group by FK name
+            fk_dict = {}
+            for row in fk_rows:
+                fk_name = row.fk_name
+                if fk_name not in fk_dict:
+                    fk_dict[fk_name] = {
+                        "parent_table": row.parent_table,
+                        "referenced_table": row.referenced_table,
+                        "parent_columns": [],
+                        "referenced_columns": []
+                    }
+                fk_dict[fk_name]["parent_columns"].append(row.parent_column)
+                fk_dict[fk_name]["referenced_columns"].append(row.referenced_column)
+            
+            # Create ALTER TABLE statements for each FK
+            for fk_name, fk_data in fk_dict.items():
+                parent_cols = ", ".join(fk_data["parent_columns"])
+                ref_cols = ", ".join(fk_data["referenced_columns"])
+                statements.append(
+                    f"ALTER TABLE {fk_data['parent_table']} ADD CONSTRAINT {fk_name} "
+                    f"FOREIGN KEY ({parent_cols}) REFERENCES {fk_data['referenced_table']} ({ref_cols});"
+                )
+        
+        return "\n\n".join(statements)
\ No newline at end of file
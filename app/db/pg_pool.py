@@ -0,0 +1,144 @@
+"""
+PostgreSQL connection pools shared across requests
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+import psycopg2
+from psycopg2 import pool
+
+# Maximum connections held per distinct set of connection parameters
+PG_POOL_MAX = int(os.environ.get('PG_POOL_MAX', 16))
+
+# Maximum distinct sets of connection parameters with a live pool; the
+# least recently used pool is retired beyond this
+PG_POOL_LIMIT = int(os.environ.get('PG_POOL_LIMIT', 32))
+
+# Connections idle in a pool for longer than this many seconds are checked
+# before being handed out, since the server may have dropped them
+PG_POOL_CHECK_IDLE = float(os.environ.get('PG_POOL_CHECK_IDLE', 30))
+
+def _is_alive(connection):
+    """
+    Check that the server still answers on a connection
+    
+    Args:
+        connection: psycopg2 connection
+        
+    Returns:
+        bool: True if a trivial query succeeded
+    """
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not connection.autocommit:
+            connection.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+class _RetirablePool(pool.ThreadedConnectionPool):
+    """
+    Threaded connection pool that keeps up to maxconn idle connections,
+    checks long idle ones before handing them out, and can be retired
+    while connections are still borrowed from it
+    """
+
+    def __init__(self, maxconn, **params):
+        """
+        Create the pool without opening any connection
+        
+        Args:
+            maxconn (int): Maximum connections, borrowed and idle together
+            **params: psycopg2.connect keyword parameters
+        """
+        super().__init__(0, maxconn, **params)
+        # psycopg2 only keeps minconn connections when they are handed
+        # back and closes the rest, so raise it once nothing is opened
+        self.minconn = maxconn
+        self._idle_since = {}
+
+    def getconn(self, key=None):
+        """
+        Borrow a connection, replacing idle ones the server has dropped
+        
+        Returns:
+            connection: psycopg2 connection
+        """
+        while True:
+            with self._lock:
+                connection = self._getconn(key)
+                idle_since = self._idle_since.pop(id(connection), None)
+            if connection.closed:
+                self.putconn(connection, close=True)
+            elif (idle_since is not None and time.monotonic() - idle_since > PG_POOL_CHECK_IDLE
+                  and not _is_alive(connection)):
+                self.putconn(connection, close=True)
+            else:
+                return connection
+
+    def _putconn(self, conn, key=None, close=False):
+        """
+        Hand a connection back, remembering when it went idle
+        """
+        super()._putconn(conn, key, close)
+        if self._pool and self._pool[-1] is conn:
+            self._idle_since[id(conn)] = time.monotonic()
+
+    def retire(self):
+        """
+        Close the idle connections now and every borrowed connection when
+        it is handed back, instead of keeping it for reuse
+        """
+        with self._lock:
+            self.minconn = 0
+            while self._pool:
+                self._pool.pop().close()
+            self._idle_since.clear()
+
+_POOLS = OrderedDict()
+_POOLS_LOCK = threading.Lock()
+
+def get_pool(params):
+    """
+    Get the connection pool for a set of connection parameters
+    
+    Pools are created on first use. Connection parameters come from
+    clients, so at most PG_POOL_LIMIT pools are kept and the least recently
+    used one is retired to make room.
+    
+    Args:
+        params (dict): psycopg2.connect keyword parameters
+    
+    Returns:
+        psycopg2.pool.ThreadedConnectionPool: Pool for these parameters
+    """
+    key = frozenset(params.items())
+    with _POOLS_LOCK:
+        connection_pool = _POOLS.get(key)
+        if connection_pool is not None:
+            _POOLS.move_to_end(key)
+            return connection_pool
+    
+    # Build outside the lock, so nothing a pool does on creation can hold
+    # up other requests looking up their pools
+    candidate = _RetirablePool(PG_POOL_MAX, **params)
+    
+    retired = None
+    with _POOLS_LOCK:
+        connection_pool = _POOLS.get(key)
+        if connection_pool is None:
+            connection_pool = _POOLS[key] = candidate
+            if len(_POOLS) > PG_POOL_LIMIT:
+                _, retired = _POOLS.popitem(last=False)
+        else:
+            # Another request built one meanwhile, keep theirs
+            _POOLS.move_to_end(key)
+            retired = candidate
+    
+    # Close connections outside the lock, they may wait on the network
+    if retired is not None:
+        retired.retire()
+    return connection_pool
@@ -0,0 +1,270 @@
+"""
+Lightweight SQL inspection used for cache invalidation
+
+Both checks fail closed: a query they cannot classify with confidence is
+reported as a write, or as reading unknown tables, so it is never cached
+against table versions it might not follow.
+"""
+
+import re
+
+# One token per match; string literals, quoted identifiers and comments are
+# consumed whole so keywords inside them are never seen. Anything left
+# unterminated falls through to "bad"
+_TOKEN_RE = re.compile(r"""
+    (?P<skip>\s+|--[^\n]*|/\*.*?\*/)
+  | (?P<literal>[Ee]'(?:[^'\\]|\\.|'')*'|[Nn]?'(?:[^']|'')*'
+        |\$(?P<tag>(?:[^\W\d]\w*)?)\$.*?\$(?P=tag)\$|\$\d+|\d+(?:\.\d*)?(?:[Ee][+-]?\d+)?)
+  | (?P<quoted>"(?:[^"]|"")+"|\[[^\]]+\]|`[^`]+`)
+  | (?P<word>[^\W\d][\w$#@]*|[@#][\w$#@]*)
+  | (?P<bad>['"`\[$]|/\*)
+  | (?P<punct>\S)
+""", re.VERBOSE | re.DOTALL)
+
+# Leading keywords of statements that only read
+_READ_STARTS = frozenset(("SELECT", "WITH", "VALUES", "TABLE"))
+
+# Any of these words anywhere marks the query as a write, which also
+# catches data-modifying CTEs and SELECT ... INTO; false positives only
+# skip the cache
+_WRITE_WORDS = frozenset((
+    "INSERT", "UPDATE", "DELETE", "MERGE", "TRUNCATE", "CREATE", "ALTER",
+    "DROP", "GRANT", "REVOKE", "INTO", "EXEC", "EXECUTE", "CALL", "DO",
+    "COPY", "LOCK", "REFRESH", "VACUUM", "REINDEX", "CLUSTER",
+))
+
+# Procedure calls, anonymous blocks, bulk loads and schema or permission
+# changes affect tables the query text does not name as table references
+_OPAQUE_WORDS = frozenset((
+    "EXEC", "EXECUTE", "CALL", "COPY", "CREATE", "ALTER", "DROP", "GRANT",
+    "REVOKE", "REFRESH",
+))
+
+# Keywords followed by a table reference
+_TABLE_KEYWORDS = frozenset(("FROM", "JOIN", "APPLY", "UPDATE", "INTO", "TABLE", "TRUNCATE", "USING"))
+
+# Table keywords that may be followed by a comma separated list of tables
+_LIST_KEYWORDS = frozenset(("FROM", "USING", "TRUNCATE"))
+
+# Words that may sit between a table keyword and the table name
+_NAME_PREFIXES = frozenset(("ONLY", "LATERAL", "TABLE"))
+
+# Words after UPDATE that show it is not followed by a table name, as in
+# MERGE ... THEN UPDATE SET, ON CONFLICT DO UPDATE SET and FOR UPDATE
+_NOT_TABLE_AFTER_UPDATE = frozenset(("SET", "OF", "NOWAIT", "SKIP"))
+
+# Words that end a table list at the same nesting level
+_LIST_END_WORDS = frozenset((
+    "WHERE", "GROUP", "HAVING", "ORDER", "LIMIT", "OFFSET", "FETCH", "UNION",
+    "INTERSECT", "EXCEPT", "WINDOW", "FOR", "RETURNING", "WHEN", "OPTION",
+    "SET", "SELECT", "CASCADE", "RESTRICT", "RESTART", "CONTINUE",
+))
+
+_SEMICOLON = ("punct", ";")
+_OPEN = ("punct", "(")
+_DOT = ("punct", ".")
+
+def _tokenize(query):
+    """
+    Split a query into tokens, dropping whitespace and comments
+    
+    Args:
+        query (str): SQL query
+    
+    Returns:
+        list: (kind, value) pairs, where kind is "word", "quoted", "literal"
+            or "punct", word values are uppercased and literal values are
+            None; or None if the query has an unterminated literal,
+            identifier or comment
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        if kind == "bad":
+            return None
+        if kind == "word":
+            tokens.append((kind, match.group().upper()))
+        elif kind == "quoted":
+            tokens.append((kind, match.group()[1:-1]))
+        elif kind == "literal":
+            tokens.append((kind, None))
+        elif kind == "punct":
+            tokens.append((kind, match.group()))
+    return tokens
+
+def _is_name(token):
+    return token[0] == "word" or token[0] == "quoted"
+
+def _read_table(tokens, position, keyword, tables):
+    """
+    Read the table reference following a table keyword
+    
+    Args:
+        tokens (list): Tokens from _tokenize
+        position (int): Index of the token after the keyword
+        keyword (str): Keyword introducing the reference
+        tables (set): Table names, extended in place
+    
+    Returns:
+        tuple: Index of the first token after the name, or None if the
+            reference cannot be analysed; and whether the reference is a
+            parenthesis, a subquery or a parenthesized join, starting at
+            that index
+    """
+    count = len(tokens)
+    while position < count and tokens[position][0] == "word" and tokens[position][1] in _NAME_PREFIXES:
+        position += 1
+    if position >= count:
+        return None, False
+    
+    if tokens[position] == _OPEN:
+        # The caller opens a frame for it
+        return position, True
+    if not _is_name(tokens[position]):
+        return None, False
+    
+    # Dotted name, keeping its last component
+    name = tokens[position][1]
+    position += 1
+    while position < count and tokens[position] == _DOT:
+        if position + 1 >= count or not _is_name(tokens[position + 1]):
+            return None, False
+        name = tokens[position + 1][1]
+        position += 2
+    
+    # After INTO a parenthesis opens the column list; elsewhere the name
+    # is a table-valued function, which may read anything
+    if position < count and tokens[position] == _OPEN and keyword != "INTO":
+        return None, False
+    
+    tables.add(name.lower())
+    return position, False
+
+def query_tables(query):
+    """
+    Get the tables a query references
+    
+    Names are reduced to their last component and lowercased, so
+    schema-qualified and bare references to a table compare equal. Tables
+    read through views, functions or triggers are not visible here.
+    
+    Args:
+        query (str): SQL query
+    
+    Returns:
+        tuple: Sorted unique table names, or None if the query cannot be
+            analysed with confidence
+    """
+    tokens = _tokenize(query)
+    if tokens is None:
+        return None
+    
+    tables = set()
+    # One frame per open parenthesis, recording whether it holds a query
+    # rather than function arguments or a column list, and whether a table
+    # list is open at that level
+    frames = [{"query": True, "list": False}]
+    # Set when a table reference starts with the next parenthesis
+    reference_paren = False
+    previous = None
+    position = 0
+    count = len(tokens)
+    
+    while position < count:
+        token = tokens[position]
+        kind, value = token
+        frame = frames[-1]
+        position += 1
+    
+        if kind == "punct":
+            if value == "(":
+                following = tokens[position] if position < count else None
+                if following is not None and following[0] == "word" and following[1] in _READ_STARTS:
+                    frames.append({"query": True, "list": False})
+                elif reference_paren:
+                    # Parenthesized join, read like a FROM list
+                    frames.append({"query": True, "list": True})
+                    position, reference_paren = _read_table(tokens, position, "FROM", tables)
+                    if position is None:
+                        return None
+                    previous = token
+                    continue
+                else:
+                    frames.append({"query": False, "list": False})
+            elif value == ")":
+                frames.pop()
+                if not frames:
+                    return None
+            elif value == "," and frame["list"]:
+                # Another table follows in the list
+                position, reference_paren = _read_table(tokens, position, "FROM", tables)
+                if position is None:
+                    return None
+                previous = token
+                continue
+            elif value == ";":
+                frame["list"] = False
+    
+        elif kind == "word":
+            if value in _OPAQUE_WORDS:
+                return None
+            # An anonymous block, unlike ON CONFLICT ... DO
+            if value == "DO" and (previous is None or previous == _SEMICOLON):
+                return None
+    
+            if frame["query"]:
+                if value in _LIST_END_WORDS:
+                    frame["list"] = False
+                if value in _TABLE_KEYWORDS:
+                    following = tokens[position] if position < count else _SEMICOLON
+                    if value == "FROM" and previous == ("word", "DISTINCT"):
+                        # IS DISTINCT FROM compares values
+                        pass
+                    elif value == "UPDATE" and (following == _SEMICOLON or (
+                            following[0] == "word" and following[1] in _NOT_TABLE_AFTER_UPDATE)):
+                        pass
+                    else:
+                        if value in _LIST_KEYWORDS:
+                            frame["list"] = True
+                        position, reference_paren = _read_table(tokens, position, value, tables)
+                        if position is None:
+                            return None
+                        previous = token
+                        continue
+    
+        reference_paren = False
+        previous = token
+    
+    if len(frames) != 1:
+        return None
+    return tuple(sorted(tables))
+
+def is_write_query(query):
+    """
+    Check whether a query may modify data or schema
+    
+    Only single statements that start like a read and contain no write
+    keyword count as reads.
+    
+    Args:
+        query (str): SQL query
+    
+    Returns:
+        bool: True if the query may write
+    """
+    tokens = _tokenize(query)
+    if not tokens:
+        return True
+    
+    kind, value = tokens[0]
+    if kind != "word" or value not in _READ_STARTS:
+        return True
+    
+    last = len(tokens) - 1
+    for index, token in enumerate(tokens):
+        if token[0] == "word" and token[1] in _WRITE_WORDS:
+            return True
+        # A second statement in the batch may do anything
+        if token == _SEMICOLON and index < last:
+            return True
+    return False
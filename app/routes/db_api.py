@@ -3,16 +3,21 @@ API routes for database operations
 """
 
 import time
+import logging
 from flask import Blueprint, request, jsonify
 from app.services.db_service import execute_query_with_cache, get_ddl_with_cache
+from app.cache.redis_cache import etag_cache_key, get_etag, set_etag
+from app.utils.etag import ddl_etag, ddl_response, etag_matches, not_modified
+
+log = logging.getLogger(__name__)
 
 # Try to use the simple hash verifier instead of the cryptography-based one
 try:
     from app.utils.hash_verifier_simple import verify_hash
-    print("Using simplified hash verification")
+    log.debug("Using simplified hash verification")
 except ImportError:
     from app.utils.hash_verifier import verify_hash
-    print("Using cryptography-based hash verification")
+    log.debug("Using cryptography-based hash verification")
 
 # Create Blueprint
 bp = Blueprint('db_api', __name__, url_prefix='/api')
@@ -27,6 +32,8 @@ def execute_query_api():
         "connection_hash": "hashed_connection_string",
         "db_type": "postgres|fabric",
         "query": "SELECT * FROM users",
+        "stream": true|false,
+        "format": "records|rows|csv",
         "cache_enabled": true|false,
         "cache_ttl": 3600
     }
@@ -46,6 +53,8 @@ def execute_query_api():
         connection_hash = request_data.get('connection_hash')
         db_type = request_data.get('db_type')
         query = request_data.get('query')
+        stream = request_data.get('stream', False)
+        result_format = request_data.get('format', 'records')
         
         # Cache settings
         cache_enabled = request_data.get('cache_enabled', False)
@@ -58,6 +67,8 @@ def execute_query_api():
             return jsonify({"error": "db_type is required"}), 400
         if not query:
             return jsonify({"error": "query is required"}), 400
+        if result_format not in ('records', 'rows', 'csv'):
+            return jsonify({"error": "format must be 'records', 'rows' or 'csv'"}), 400
         
         # Verify and get connection string
         connection_string = verify_hash(connection_hash)
@@ -65,11 +76,13 @@ def execute_query_api():
             return jsonify({"error": "Invalid connection hash"}), 400
         
         # Execute query with caching
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = execute_query_with_cache(connection_string, db_type, query, 
+                                         stream=stream,
+                                         result_format=result_format,
                                          cache_enabled=cache_enabled, 
                                          cache_ttl=cache_ttl)
-        execution_time = time.time() - start_time
+        execution_time = (time.perf_counter_ns() - start_time) / 1e9
         
         # Add execution time to result
         result["execution_time"] = execution_time
@@ -79,8 +92,7 @@ def execute_query_api():
     except ConnectionError as e:
         return jsonify({"error": f"Connection error: {str(e)}"}), 500
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Unhandled error in %s", request.path)
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/ddl', methods=['POST'])
@@ -99,7 +111,9 @@ def get_ddl_api():
     }
     
     Returns:
-        JSON: DDL definition
+        JSON: DDL definition, tagged with an ETag; 304 Not Modified when
+        If-None-Match lists it, see app/utils/etag.py for how this differs
+        from standard conditional requests
     """
     try:
         # Get request data
@@ -109,7 +123,7 @@ def get_ddl_api():
         if not request_data:
             return jsonify({"error": "No request data provided"}), 400
         
-        print(f"Received request data: {request_data}")
+        log.debug("Received request data: %s", request_data)
         
         # Extract parameters
         connection_hash = request_data.get('connection_hash')
@@ -137,23 +151,37 @@ def get_ddl_api():
         except Exception as e:
             return jsonify({"error": f"Hash verification error: {str(e)}"}), 400
         
-        print(f"Verified connection string: {connection_string[:30]}...")
+        # With caching enabled, a client revalidating the DDL it already
+        # holds is answered from the remembered ETag without any lookup
+        etag_key = etag_cache_key(db_type, connection_string, object_name, object_type)
+        if cache_enabled and request.if_none_match:
+            known_etag = get_etag(etag_key)
+            if known_etag and etag_matches(known_etag):
+                return not_modified(known_etag)
         
         # Get DDL with caching
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = get_ddl_with_cache(connection_string, db_type, object_name, object_type,
                                    cache_enabled=cache_enabled,
                                    cache_ttl=cache_ttl)
-        execution_time = time.time() - start_time
+        execution_time = (time.perf_counter_ns() - start_time) / 1e9
         
         # Add execution time to result
         result["execution_time"] = execution_time
         
-        return jsonify(result)
+        if result.get("status") != "success":
+            return jsonify(result)
+        
+        etag = ddl_etag(result)
+        if cache_enabled:
+            set_etag(etag_key, etag, cache_ttl)
+        if etag_matches(etag):
+            return not_modified(etag)
+        
+        return ddl_response(result, etag)
     
     except ConnectionError as e:
         return jsonify({"error": f"Connection error: {str(e)}"}), 500
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Unhandled error in %s", request.path)
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -3,13 +3,68 @@ Direct connection API routes - alternative to hash-based connection
 """
 
 import time
-from flask import Blueprint, request, jsonify
+import logging
+import msgpack
+from flask import Blueprint, Response, request, jsonify
 from app.db import get_db_connector
 from app.services.db_service import execute_query_with_cache, get_ddl_with_cache
+from app.cache.redis_cache import etag_cache_key, get_etag, set_etag
+from app.utils.etag import ddl_etag, ddl_response, etag_matches, not_modified
+
+log = logging.getLogger(__name__)
 
 # Create Blueprint
 bp = Blueprint('direct_connect', __name__, url_prefix='/api/direct')
 
+def _run_direct_query(request_data):
+    """
+    Validate a direct query request and execute it
+    
+    Args:
+        request_data (dict): Parsed request body
+        
+    Returns:
+        tuple: (result, None) on success, or (None, error response)
+    """
+    # Validate request data
+    if not request_data:
+        return None, (jsonify({"error": "No request data provided"}), 400)
+    
+    # Extract parameters
+    connection_string = request_data.get('connection_string')
+    db_type = request_data.get('db_type')
+    query = request_data.get('query')
+    stream = request_data.get('stream', False)
+    result_format = request_data.get('format', 'records')
+    
+    # Cache settings
+    cache_enabled = request_data.get('cache_enabled', False)
+    cache_ttl = request_data.get('cache_ttl', 3600)  # Default: 1 hour
+    
+    # Validate required parameters
+    if not connection_string:
+        return None, (jsonify({"error": "connection_string is required"}), 400)
+    if not db_type:
+        return None, (jsonify({"error": "db_type is required"}), 400)
+    if not query:
+        return None, (jsonify({"error": "query is required"}), 400)
+    if result_format not in ('records', 'rows', 'csv'):
+        return None, (jsonify({"error": "format must be 'records', 'rows' or 'csv'"}), 400)
+    
+    # Execute query with caching
+    start_time = time.perf_counter_ns()
+    result = execute_query_with_cache(connection_string, db_type, query, 
+                                     stream=stream,
+                                     result_format=result_format,
+                                     cache_enabled=cache_enabled, 
+                                     cache_ttl=cache_ttl)
+    execution_time = (time.perf_counter_ns() - start_time) / 1e9
+    
+    # Add execution time to result
+    result["execution_time"] = execution_time
+    
+    return result, None
+
 @bp.route('/query', methods=['POST'])
 def execute_query_direct():
     """
@@ -20,6 +75,8 @@ def execute_query_direct():
         "connection_string": "actual connection string",
         "db_type": "postgres|fabric",
         "query": "SELECT * FROM users",
+        "stream": true|false,
+        "format": "records|rows|csv",
         "cache_enabled": true|false,
         "cache_ttl": 3600
     }
@@ -28,47 +85,43 @@ def execute_query_direct():
         JSON: Query results
     """
     try:
-        # Get request data
-        request_data = request.get_json()
-        
-        # Validate request data
-        if not request_data:
-            return jsonify({"error": "No request data provided"}), 400
-        
-        # Extract parameters
-        connection_string = request_data.get('connection_string')
-        db_type = request_data.get('db_type')
-        query = request_data.get('query')
-        
-        # Cache settings
-        cache_enabled = request_data.get('cache_enabled', False)
-        cache_ttl = request_data.get('cache_ttl', 3600)  # Default: 1 hour
-        
-        # Validate required parameters
-        if not connection_string:
-            return jsonify({"error": "connection_string is required"}), 400
-        if not db_type:
-            return jsonify({"error": "db_type is required"}), 400
-        if not query:
-            return jsonify({"error": "query is required"}), 400
-        
-        # Execute query with caching
-        start_time = time.time()
-        result = execute_query_with_cache(connection_string, db_type, query, 
-                                         cache_enabled=cache_enabled, 
-                                         cache_ttl=cache_ttl)
-        execution_time = time.time() - start_time
-        
-        # Add execution time to result
-        result["execution_time"] = execution_time
+        result, error = _run_direct_query(request.get_json())
+        if error:
+            return error
         
         return jsonify(result)
     
     except ConnectionError as e:
         return jsonify({"error": f"Connection error: {str(e)}"}), 500
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Unhandled error in %s", request.path)
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/query.bin', methods=['POST'])
+def execute_query_direct_bin():
+    """
+    API endpoint to execute queries with direct connection string,
+    answering in MessagePack for service-to-service callers
+    
+    Request body: same JSON as /api/direct/query
+    
+    Returns:
+        MessagePack: Query results; errors are still returned as JSON
+    """
+    try:
+        result, error = _run_direct_query(request.get_json())
+        if error:
+            return error
+        
+        # Values msgpack has no type for, such as dates and decimals,
+        # are sent as strings like in the Redis cache
+        payload = msgpack.packb(result, use_bin_type=True, default=str)
+        return Response(payload, mimetype='application/msgpack')
+    
+    except ConnectionError as e:
+        return jsonify({"error": f"Connection error: {str(e)}"}), 500
+    except Exception as e:
+        log.exception("Unhandled error in %s", request.path)
         return jsonify({"error": str(e)}), 500
 
 @bp.route('/ddl', methods=['POST'])
@@ -87,7 +140,9 @@ def get_ddl_direct():
     }
     
     Returns:
-        JSON: DDL definition
+        JSON: DDL definition, tagged with an ETag; 304 Not Modified when
+        If-None-Match lists it, see app/utils/etag.py for how this differs
+        from standard conditional requests
     """
     try:
         # Get request data
@@ -115,21 +170,37 @@ def get_ddl_direct():
         if not object_type:
             return jsonify({"error": "object_type is required"}), 400
         
+        # With caching enabled, a client revalidating the DDL it already
+        # holds is answered from the remembered ETag without any lookup
+        etag_key = etag_cache_key(db_type, connection_string, object_name, object_type)
+        if cache_enabled and request.if_none_match:
+            known_etag = get_etag(etag_key)
+            if known_etag and etag_matches(known_etag):
+                return not_modified(known_etag)
+        
         # Get DDL with caching
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         result = get_ddl_with_cache(connection_string, db_type, object_name, object_type,
                                    cache_enabled=cache_enabled,
                                    cache_ttl=cache_ttl)
-        execution_time = time.time() - start_time
+        execution_time = (time.perf_counter_ns() - start_time) / 1e9
         
         # Add execution time to result
         result["execution_time"] = execution_time
         
-        return jsonify(result)
+        if result.get("status") != "success":
+            return jsonify(result)
+        
+        etag = ddl_etag(result)
+        if cache_enabled:
+            set_etag(etag_key, etag, cache_ttl)
+        if etag_matches(etag):
+            return not_modified(etag)
+        
+        return ddl_response(result, etag)
     
     except ConnectionError as e:
         return jsonify({"error": f"Connection error: {str(e)}"}), 500
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("Unhandled error in %s", request.path)
         return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -2,35 +2,89 @@
 Database service functions with caching
 """
 
-from app.db import get_db_connector
-from app.cache.redis_cache import redis_cache
+import logging
+from app.db import get_db_connector, canonical_db_type
+from app.db.query_tables import query_tables, is_write_query
+from app.cache.redis_cache import redis_cache, get_table_versions, bump_table_versions
 
-@redis_cache
-def execute_query_with_cache(connection_string, db_type, query, **kwargs):
+log = logging.getLogger(__name__)
+
+def execute_query_with_cache(connection_string, db_type, query, stream=False,
+                             result_format="records", **kwargs):
     """
     Execute query with Redis cache support
     
+    Cached results are bound to the versions of the tables the query reads
+    and of the database as a whole. Queries that write are never cached and
+    bump the versions of the tables they touch, or of the whole database
+    when those tables are unknown, so later reads miss the cache; this
+    happens whether or not cache_enabled is set on the write. Reads whose
+    tables cannot be determined are not cached.
+    
     Args:
         connection_string (str): Database connection string
         db_type (str): Database type (fabric, postgres)
         query (str): SQL query to execute
+        stream (bool): Read large result sets incrementally
+        result_format (str): "records" for a dict per row, "rows" for
+            column names once plus value lists, "csv" for a bulk CSV export
+            (PostgreSQL only)
         **kwargs: Additional parameters, including cache settings
         
     Returns:
         dict: Query results with status and metadata
     """
-    try:
-        # Get appropriate database connector
-        connector = get_db_connector(connection_string, db_type)
-        
-        # Connect to database
-        connector.connect()
-        
-        # Execute query
-        result = connector.execute_query(query)
+    # Every spelling of a database type shares the same versions
+    scope = (canonical_db_type(db_type), connection_string)
+    
+    if is_write_query(query):
+        kwargs['cache_enabled'] = False
+        result = _execute_query_cached(connection_string, db_type, query, stream=stream,
+                                       result_format=result_format, **kwargs)
+        # Bump even on error, a multi-statement batch may have partly applied
+        bump_table_versions(scope, query_tables(query) or None)
+        return result
+    
+    if kwargs.get('cache_enabled'):
+        # Part of the cache key, so a write to any of these tables moves
+        # later reads onto a fresh entry; None if the tables are unknown
+        # or Redis is unreachable
+        tables = query_tables(query)
+        table_versions = get_table_versions(scope, tables) if tables is not None else None
+        if table_versions is None:
+            kwargs['cache_enabled'] = False
+        else:
+            kwargs['table_versions'] = table_versions
+    
+    return _execute_query_cached(connection_string, db_type, query, stream=stream,
+                                 result_format=result_format, **kwargs)
+
+@redis_cache
+def _execute_query_cached(connection_string, db_type, query, stream=False,
+                          result_format="records", **kwargs):
+    """
+    Execute query, cached by redis_cache when cache_enabled is set
+    
+    Args:
+        connection_string (str): Database connection string
+        db_type (str): Database type (fabric, postgres)
+        query (str): SQL query to execute
+        stream (bool): Read large result sets incrementally
+        result_format (str): "records" for a dict per row, "rows" for
+            column names once plus value lists, "csv" for a bulk CSV export
+            (PostgreSQL only)
+        **kwargs: Additional parameters, including cache settings and the
+            table versions the cache key is bound to
         
-        # Disconnect
-        connector.disconnect()
+    Returns:
+        dict: Query results with status and metadata
+    """
+    try:
+        # Get appropriate database connector, connected for the with block
+        with get_db_connector(connection_string, db_type) as connector:
+            # Execute query
+            result = connector.execute_query(query, stream=stream,
+                                             result_format=result_format)
         
         return {
             "status": "success",
@@ -64,19 +118,12 @@ def get_ddl_with_cache(connection_string, db_type, object_name, object_type, **k
         dict: DDL statement with status and metadata
     """
     try:
-        print(f"Getting DDL for {object_name} of type {object_type} from {db_type} database")
+        log.debug("Getting DDL for %s of type %s from %s database", object_name, object_type, db_type)
 
-        # Get appropriate database connector
-        connector = get_db_connector(connection_string, db_type)
-        
-        # Connect to database
-        connector.connect()
-        
-        # Get DDL
-        ddl = connector.get_ddl(object_name, object_type)
-        
-        # Disconnect
-        connector.disconnect()
+        # Get appropriate database connector, connected for the with block
+        with get_db_connector(connection_string, db_type) as connector:
+            # Get DDL
+            ddl = connector.get_ddl(object_name, object_type)
         
         return {
             "status": "success",
@@ -87,7 +134,7 @@ def get_ddl_with_cache(connection_string, db_type, object_name, object_type, **k
             "cached": False  # This will be overwritten if returned from cache
         }
     except Exception as e:
-        print(f"Error getting DDL: {str(e)}")
+        log.error("Error getting DDL: %s", e)
 
         return {
             "status": "error",
@@ -2,6 +2,6 @@
 Utilities package initialization
 """
 
-from app.utils.hash_verifier import verify_hash, encrypt_connection_string
+from app.utils.hash_verifier import verify_hash, encrypt_connection_string, encrypt_many
 
-__all__ = ['verify_hash', 'encrypt_connection_string']
\ No newline at end of file
+__all__ = ['verify_hash', 'encrypt_connection_string', 'encrypt_many']
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+ETag helpers for conditional DDL requests
+
+The DDL endpoints take their parameters in a POST body, so RFC 9110
+conditional handling does not apply as written: it defines 304 only for GET
+and HEAD and answers a matching If-None-Match on other methods with 412.
+These endpoints instead treat If-None-Match as a revalidation hint. Only an
+explicitly listed ETag matches, "*" never does, and a match answers 304.
+"""
+
+import os
+import hashlib
+from flask import jsonify, make_response, request
+
+# How long clients may reuse a DDL response without revalidating
+DDL_MAX_AGE = int(os.environ.get('DDL_MAX_AGE', 60))
+
+def ddl_etag(result):
+    """
+    Derive the ETag of a DDL result from the DDL itself
+    
+    Args:
+        result (dict): Successful result of get_ddl_with_cache
+        
+    Returns:
+        str: ETag value
+    """
+    data = f"{result['object_name']}|{result['object_type']}|{result['ddl']}"
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+def etag_matches(etag):
+    """
+    Check whether the request's If-None-Match explicitly lists an ETag,
+    strong or weak
+    
+    Args:
+        etag (str): ETag of the current DDL
+        
+    Returns:
+        bool: True if the client already holds this DDL
+    """
+    # If-None-Match uses weak comparison, so W/"..." as sent back by
+    # proxies that recompress the body still matches
+    if_none_match = request.if_none_match
+    return not if_none_match.star_tag and if_none_match.contains_weak(etag)
+
+def not_modified(etag):
+    """
+    Build an empty 304 response for a matching ETag
+    
+    Args:
+        etag (str): ETag the client already holds
+        
+    Returns:
+        Response: 304 Not Modified
+    """
+    response = make_response("", 304)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"private, max-age={DDL_MAX_AGE}"
+    return response
+
+def ddl_response(result, etag):
+    """
+    Build the JSON response for a DDL result, tagged with its ETag
+    
+    Args:
+        result (dict): Result of get_ddl_with_cache
+        etag (str): ETag of the result
+        
+    Returns:
+        Response: JSON response
+    """
+    response = make_response(jsonify(result))
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"private, max-age={DDL_MAX_AGE}"
+    return response
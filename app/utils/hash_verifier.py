@@ -1,15 +1,63 @@
 """
 Simplified hash verification utility for connection strings
-Uses simple encoding instead of cryptography libraries to avoid system dependencies
+Uses simple encoding instead of cryptography libraries to avoid system dependencies,
+unless HASH_SCHEME=fernet opts into real encryption
 """
 
 import os
 import base64
+import binascii
 import hashlib
+import hmac
+import logging
+from functools import lru_cache
+
+log = logging.getLogger(__name__)
 
 # Configuration
 HASH_SECRET = os.environ.get('HASH_SECRET', 'default_secret_key_change_me')
 
+# "simple" signs and base64-wraps connection strings; "fernet" encrypts
+# them with AES via the cryptography package
+HASH_SCHEME = os.environ.get('HASH_SCHEME', 'simple').lower()
+
+# Number of connection strings and hashes remembered per worker process
+HASH_CACHE_SIZE = int(os.environ.get('HASH_CACHE_SIZE', 4096))
+
+# Shortest valid hash: base64 of a 32-byte signature and one more byte
+_MIN_HASH_LENGTH = 44
+
+# HMAC key, encoded once
+_SECRET_BYTES = HASH_SECRET.encode()
+
+def _sign(conn_bytes):
+    """
+    Compute the HMAC-SHA256 signature of an encoded connection string
+    
+    Args:
+        conn_bytes (bytes): UTF-8 encoded connection string
+        
+    Returns:
+        bytes: 32-byte signature
+    """
+    return hmac.digest(_SECRET_BYTES, conn_bytes, 'sha256')
+
+def _legacy_sign(conn_bytes):
+    """
+    Compute the signature used by hashes in the legacy double base64 layout
+    
+    Same digest as sha256(connection_string + HASH_SECRET).
+    
+    Args:
+        conn_bytes (bytes): UTF-8 encoded connection string
+        
+    Returns:
+        bytes: 32-byte signature
+    """
+    signature = hashlib.sha256(conn_bytes)
+    signature.update(_SECRET_BYTES)
+    return signature.digest()
+
 def simple_encrypt(connection_string):
     """
     Simple encryption for connection strings that doesn't rely on cryptography libraries
@@ -21,54 +69,178 @@ def simple_encrypt(connection_string):
         str: Base64-encoded "encrypted" string
     """
     try:
-        # Create a signature with the connection string and secret
-        signature = hashlib.sha256((connection_string + HASH_SECRET).encode()).digest()
+        # Encode the connection string once for both signing and wrapping
+        conn_bytes = connection_string.encode()
         
-        # Encode the connection string
-        encoded_conn = base64.b64encode(connection_string.encode()).decode()
+        # Sign the connection string with the secret as HMAC key
+        signature = _sign(conn_bytes)
         
-        # Combine signature and encoded connection string
-        result = base64.b64encode(signature + encoded_conn.encode()).decode()
+        # Combine signature and connection string under a single base64 layer
+        result = binascii.b2a_base64(signature + conn_bytes, newline=False).decode('ascii')
         
         return result
     except Exception as e:
-        print(f"Simple encryption error: {str(e)}")
+        log.error("Simple encryption error: %s", e)
         return None
 
 def simple_decrypt(hash_value):
     """
     Simple decryption for connection strings
     
+    Hashes issued before the single base64 layout, where the connection
+    string was base64-encoded a second time, are still accepted.
+    
     Args:
         hash_value (str): Base64-encoded hash string
         
     Returns:
         str: Decrypted connection string
     """
+    # A 32-byte signature plus at least one byte of connection string
+    # needs 44 base64 characters; reject non-strings and impossible
+    # lengths before decoding
+    if not isinstance(hash_value, str) or len(hash_value) < _MIN_HASH_LENGTH or len(hash_value) % 4:
+        return None
+    
     try:
-        # Decode the outer base64
-        decoded = base64.b64decode(hash_value)
+        # Decode the outer base64, failing fast on characters outside the alphabet
+        decoded = memoryview(binascii.a2b_base64(hash_value, strict_mode=True))
         
-        # Extract signature (first 32 bytes) and encoded connection string
+        # Extract signature (first 32 bytes) and connection string as views,
+        # signing and comparison both accept buffers so neither is copied
         signature = decoded[:32]
-        encoded_conn = decoded[32:].decode()
-        
-        # Decode the connection string
-        connection_string = base64.b64decode(encoded_conn).decode()
+        conn_bytes = decoded[32:]
         
         # Verify the signature
-        expected_signature = hashlib.sha256((connection_string + HASH_SECRET).encode()).digest()
+        expected_signature = _sign(conn_bytes)
+        
+        if not hmac.compare_digest(signature, expected_signature):
+            # Fall back to the legacy layout with an inner base64 layer
+            try:
+                conn_bytes = binascii.a2b_base64(conn_bytes, strict_mode=True)
+            except binascii.Error:
+                log.info("Invalid signature")
+                return None
+            expected_signature = _legacy_sign(conn_bytes)
         
-        # Simple signature comparison (not timing-safe but simpler)
-        if signature != expected_signature:
-            print("Invalid signature")
+        # Constant-time signature comparison
+        if not hmac.compare_digest(signature, expected_signature):
+            log.info("Invalid signature")
             return None
             
-        return connection_string
+        return str(conn_bytes, 'utf-8')
+    except Exception as e:
+        log.info("Simple decryption error: %s", e)
+        return None
+
+def fernet_encrypt(connection_string):
+    """
+    Encrypt a connection string with Fernet (AES-128-CBC and HMAC-SHA256)
+    
+    Args:
+        connection_string (str): Database connection string to encrypt
+        
+    Returns:
+        str: Fernet token
+    """
+    try:
+        return _FERNET.encrypt(connection_string.encode()).decode('ascii')
     except Exception as e:
-        print(f"Simple decryption error: {str(e)}")
+        log.error("Fernet encryption error: %s", e)
         return None
 
-# For compatibility with the existing code
-encrypt_connection_string = simple_encrypt
-verify_hash = simple_decrypt
\ No newline at end of file
+def fernet_decrypt(hash_value):
+    """
+    Decrypt a Fernet token back into the connection string
+    
+    Args:
+        hash_value (str): Fernet token
+        
+    Returns:
+        str: Decrypted connection string, or None if the token is invalid
+    """
+    try:
+        return _FERNET.decrypt(hash_value).decode()
+    except InvalidToken:
+        log.info("Invalid token")
+        return None
+    except Exception as e:
+        log.info("Fernet decryption error: %s", e)
+        return None
+
+if HASH_SCHEME == 'fernet':
+    # Only this scheme needs the cryptography package
+    from cryptography.fernet import Fernet, InvalidToken
+    _FERNET = Fernet(base64.urlsafe_b64encode(hashlib.sha256(_SECRET_BYTES).digest()))
+    _encrypt, _decrypt = fernet_encrypt, fernet_decrypt
+elif HASH_SCHEME == 'simple':
+    _encrypt, _decrypt = simple_encrypt, simple_decrypt
+else:
+    raise ValueError(f"Unsupported HASH_SCHEME: {HASH_SCHEME}")
+
+# Results only depend on HASH_SECRET, so repeat calls for the same
+# connection string or hash are answered from a per-process cache
+_encrypt_cached = lru_cache(maxsize=HASH_CACHE_SIZE)(_encrypt)
+
+@lru_cache(maxsize=HASH_CACHE_SIZE)
+def _decrypt_cached(hash_value):
+    """
+    Decrypt a hash, memoized per distinct hash
+    
+    Invalid hashes raise so that lru_cache only memoizes valid ones, and
+    a stream of junk hashes cannot evict them.
+    """
+    connection_string = _decrypt(hash_value)
+    if connection_string is None:
+        raise LookupError("Invalid hash")
+    return connection_string
+
+def encrypt_connection_string(connection_string):
+    """
+    Encrypt a connection string with the configured HASH_SCHEME
+    
+    Args:
+        connection_string (str): Database connection string to encrypt
+        
+    Returns:
+        str: Hash, or None if encryption failed or the input is not a string
+    """
+    # Request bodies may carry any JSON type, and lists or dicts cannot
+    # be cache keys
+    if not isinstance(connection_string, str):
+        return None
+    return _encrypt_cached(connection_string)
+
+def verify_hash(hash_value):
+    """
+    Verify a hash and recover its connection string
+    
+    Args:
+        hash_value (str): Hash returned by encrypt_connection_string
+        
+    Returns:
+        str: Decrypted connection string, or None if the hash is invalid
+            or not a string
+    """
+    if not isinstance(hash_value, str):
+        return None
+    try:
+        return _decrypt_cached(hash_value)
+    except LookupError:
+        return None
+
+def encrypt_many(connection_strings):
+    """
+    Encrypt a batch of connection strings
+    
+    Duplicates within the batch and strings seen before are served by the
+    per-process cache.
+    
+    Args:
+        connection_strings (list): Database connection strings to encrypt
+        
+    Returns:
+        list: Hashes in input order, None where encryption failed
+    """
+    encrypt = encrypt_connection_string
+    return [encrypt(connection_string) for connection_string in connection_strings]
@@ -0,0 +1,80 @@
+"""
+orjson-backed JSON provider for Flask responses
+"""
+
+import uuid
+import decimal
+from datetime import date
+import orjson
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+# Non-string keys are stringified; dates go through _default so they keep
+# the HTTP date format of Flask's default provider
+_DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+def _default(obj):
+    """
+    Serialize the types orjson does not handle itself
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        str: Serialized value
+
+    Raises:
+        TypeError: If the object is not serializable
+    """
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider that encodes and decodes with orjson
+
+    Used by jsonify, so route handlers need no changes.
+    """
+
+    def dumps(self, obj, **kwargs):
+        """
+        Serialize data as JSON
+
+        Args:
+            obj: Data to serialize
+
+        Returns:
+            str: JSON document
+        """
+        return orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS).decode()
+
+    def response(self, *args, **kwargs):
+        """
+        Serialize data as a JSON response
+
+        Writes the encoded bytes straight into the response body instead
+        of decoding them to str and letting the response encode them again.
+
+        Returns:
+            Response: application/json response
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=_DUMPS_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype="application/json")
+
+    def loads(self, s, **kwargs):
+        """
+        Deserialize data as JSON
+
+        Args:
+            s (str | bytes): JSON document
+
+        Returns:
+            Parsed data
+        """
+        return orjson.loads(s)
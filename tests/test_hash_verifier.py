@@ -0,0 +1,53 @@
+"""
+Tests for the simple connection string hash format
+"""
+
+import base64
+import hashlib
+import pytest
+from app.utils.hash_verifier import HASH_SECRET, simple_encrypt, simple_decrypt
+
+CONNECTION_STRING = "host=localhost port=5432 dbname=testdb user=postgres password=test123"
+
+def _baseline_hash(connection_string):
+    # Layout issued before the single base64 layer: sha256(cs + secret)
+    # followed by the base64 of the connection string, base64 again
+    signature = hashlib.sha256((connection_string + HASH_SECRET).encode()).digest()
+    encoded_conn = base64.b64encode(connection_string.encode())
+    return base64.b64encode(signature + encoded_conn).decode()
+
+def test_round_trip():
+    assert simple_decrypt(simple_encrypt(CONNECTION_STRING)) == CONNECTION_STRING
+
+def test_round_trip_non_ascii():
+    connection_string = "host=localhost dbname=données password=pässwörd"
+    assert simple_decrypt(simple_encrypt(connection_string)) == connection_string
+
+def test_baseline_hash_still_verifies():
+    assert simple_decrypt(_baseline_hash(CONNECTION_STRING)) == CONNECTION_STRING
+
+def test_tampered_signature():
+    raw = bytearray(base64.b64decode(simple_encrypt(CONNECTION_STRING)))
+    raw[0] ^= 1
+    assert simple_decrypt(base64.b64encode(bytes(raw)).decode()) is None
+
+def test_tampered_baseline_signature():
+    raw = bytearray(base64.b64decode(_baseline_hash(CONNECTION_STRING)))
+    raw[0] ^= 1
+    assert simple_decrypt(base64.b64encode(bytes(raw)).decode()) is None
+
+def test_tampered_connection_string():
+    raw = base64.b64decode(simple_encrypt(CONNECTION_STRING))
+    forged = raw[:32] + CONNECTION_STRING.replace("test123", "test124").encode()
+    assert simple_decrypt(base64.b64encode(forged).decode()) is None
+
+@pytest.mark.parametrize("hash_value", [None, 12345, ["a"], {"hash": "a"}, b"bytes"])
+def test_non_string(hash_value):
+    assert simple_decrypt(hash_value) is None
+
+@pytest.mark.parametrize("hash_value", ["", "abcd", simple_encrypt(CONNECTION_STRING)[:40]])
+def test_too_short(hash_value):
+    assert simple_decrypt(hash_value) is None
+
+def test_invalid_base64():
+    assert simple_decrypt("!" * 48) is None
@@ -0,0 +1,83 @@
+"""
+Tests for the SQL inspection used by cache invalidation
+"""
+
+import pytest
+from app.db.query_tables import query_tables, is_write_query
+
+@pytest.mark.parametrize("query, tables", [
+    ("SELECT * FROM users", ("users",)),
+    ("SELECT * FROM a, b", ("a", "b")),
+    ("SELECT * FROM a x, b AS y WHERE x.id = y.id", ("a", "b")),
+    ("SELECT * FROM public.users u JOIN orders o ON o.uid = u.id, items", ("items", "orders", "users")),
+    ('SELECT * FROM "Sales"."Orders"', ("orders",)),
+    ("SELECT * FROM [dbo].[Orders] WITH (NOLOCK), customers", ("customers", "orders")),
+    ("SELECT * FROM (SELECT * FROM a) s, b", ("a", "b")),
+    ("SELECT * FROM t WHERE id IN (SELECT id FROM u)", ("t", "u")),
+    ("WITH c AS (SELECT * FROM a) SELECT * FROM c JOIN b ON c.id = b.id", ("a", "b", "c")),
+    ("SELECT * FROM (a JOIN b ON a.id = b.id)", ("a", "b")),
+    ("SELECT * FROM a, (b JOIN c ON 1=1)", ("a", "b", "c")),
+    ("SELECT * FROM a JOIN (b JOIN c ON b.x=c.x) ON a.x=b.x", ("a", "b", "c")),
+    ("SELECT * FROM ((a JOIN b ON a.id = b.id) JOIN c ON c.id = a.id)", ("a", "b", "c")),
+    ("SELECT * FROM ((SELECT * FROM a) s JOIN b ON s.id = b.id)", ("a", "b")),
+    ("SELECT extract(year FROM created_at) FROM orders", ("orders",)),
+    ("SELECT substring(name FROM 2 FOR 3) FROM t ORDER BY a, b", ("t",)),
+    ("SELECT a IS DISTINCT FROM b FROM t", ("t",)),
+    ("SELECT * FROM users WHERE note = 'see FROM other'", ("users",)),
+    ("SELECT * -- FROM hidden\nFROM t", ("t",)),
+    ("SELECT $$ FROM x $$ FROM t", ("t",)),
+    ("TABLE users", ("users",)),
+    ("SELECT 1", ()),
+    ("UPDATE ONLY t SET a = 1, b = 2 FROM s, u WHERE t.id = s.id", ("s", "t", "u")),
+    ("DELETE FROM t USING a, b WHERE t.x = a.x", ("a", "b", "t")),
+    ("INSERT INTO t (a, b) VALUES (1, 2), (3, 4)", ("t",)),
+    ("INSERT INTO t SELECT * FROM s ON CONFLICT (a) DO UPDATE SET b = 1", ("s", "t")),
+    ("MERGE INTO t USING s ON t.id = s.id WHEN MATCHED THEN UPDATE SET x = 1", ("s", "t")),
+    ("TRUNCATE TABLE a, b RESTART IDENTITY", ("a", "b")),
+])
+def test_query_tables(query, tables):
+    assert query_tables(query) == tables
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM generate_series(1, 10)",
+    "SELECT * FROM a CROSS APPLY dbo.fn(a.x)",
+    "SELECT * FROM db..t",
+    "SELECT * FROM (a JOIN generate_series(1, 3) g ON true)",
+    "SELECT * FROM (a JOIN b ON a.id = b.id",
+    "SELECT * FROM",
+    "SELECT 'unterminated FROM t",
+    "SELECT * FROM t WHERE (a = 1",
+    "EXEC dbo.refresh_totals",
+    "CALL refresh()",
+    "DO $$ BEGIN DELETE FROM t; END $$",
+    "CREATE TABLE t (a int)",
+    "DROP VIEW v",
+])
+def test_query_tables_unknown(query):
+    assert query_tables(query) is None
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM users",
+    "WITH c AS (SELECT 1) SELECT * FROM c",
+    "SELECT * FROM users WHERE note = 'please delete me'",
+    "SELECT * FROM t;",
+])
+def test_reads(query):
+    assert not is_write_query(query)
+
+@pytest.mark.parametrize("query", [
+    "INSERT INTO t VALUES (1)",
+    "UPDATE t SET a = 1",
+    "DELETE FROM t",
+    "WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d",
+    "SELECT * INTO copy_of_t FROM t",
+    "SELECT * FROM t FOR UPDATE",
+    "SELECT * FROM t; DELETE FROM u",
+    "EXEC dbo.refresh_totals",
+    "CALL refresh()",
+    "SHOW search_path",
+    "SELECT 'unterminated",
+    "",
+])
+def test_writes(query):
+    assert is_write_query(query)